@@ -1,8 +1,15 @@
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from bisect import bisect_left, insort
+import heapq
 import pickle
 import re
-from collections import UserDict
+from collections import OrderedDict, UserDict, defaultdict
+from itertools import islice
+
+
+_PICKLE_BUFFER_SIZE = 1 << 20
+_EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
 
 
 class UserInterface(ABC):
@@ -35,18 +42,16 @@ class ConsoleInterface(UserInterface):
         return input(prompt)
 
     def display_contacts(self, contacts):
-        print("Kontakty:")
-        for contact in contacts:
-            print(contact)
+        today = date.today()  # Jedna data dla całej listy
+        print("\n".join(["Kontakty:", *(contact.format(today) for contact in contacts)]))
 
     def display_notes(self, notes):
         if not notes:
             print("Brak notatek do wyświetlenia.")
             return
-        for idx, note in enumerate(notes, start=1):
-            print(f"""ID: {idx} Tytuł: {note.get('title', 'Brak tytułu')}
+        print("\n".join(f"""ID: {idx} Tytuł: {note.get('title', 'Brak tytułu')}
     Treść: {note.get('content', 'Brak treści')}
-    Tagi: {', '.join(note.get('tags', []))}""")
+    Tagi: {', '.join(sorted(note.get('tags', ())))}""" for idx, note in enumerate(notes, start=1)))
 
 
 class Field:
@@ -68,8 +73,7 @@ class Phone(Field):
 class PhoneValidator:
     @staticmethod
     def validate(phone_number):
-        pattern = re.compile(r"^\d{9}$")
-        return pattern.match(phone_number) is not None
+        return len(phone_number) == 9 and phone_number.isdecimal()
 
 
 class Email(Field):
@@ -82,9 +86,7 @@ class Email(Field):
 class EmailValidator:
     @staticmethod
     def validate(email):
-        pattern = re.compile(
-            r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$")
-        return pattern.match(email) is not None
+        return _EMAIL_RE.fullmatch(email) is not None
 
 
 class Birthday(Field):
@@ -92,13 +94,24 @@ class Birthday(Field):
         if not BirthdayValidator.validate(value):
             raise ValueError("Niepoprawna data urodzenia")
         self.value = value
+        self._date = date.fromisoformat(value)
+
+    def __setstate__(self, state):
+        # Starsze pliki z książką adresową nie zawierają sparsowanej daty;
+        # strptime akceptuje też daty bez zer wiodących, zapisane dawniej
+        self.__dict__.update(state)
+        if '_date' not in state:
+            self._date = datetime.strptime(self.value, "%Y-%m-%d").date()
 
 
 class BirthdayValidator:
     @staticmethod
     def validate(birthday):
+        # Tylko format YYYY-MM-DD (nowsze fromisoformat akceptuje też inne formy ISO)
+        if len(birthday) != 10 or birthday[4] != '-' or birthday[7] != '-':
+            return False
         try:
-            datetime.strptime(birthday, "%Y-%m-%d")
+            date.fromisoformat(birthday)
             return True
         except ValueError:
             return False
@@ -117,29 +130,40 @@ class Record:
     def __init__(self, name: Name, birthday: Birthday = None):
         self.id = None  # The ID will be assigned by AddressBook
         self.name = name
-        self.phones = []
-        self.emails = []
+        self._name_lower = name.value.casefold()  # Do wyszukiwania bez rozróżniania wielkości liter
+        self.phones = {}  # wartość numeru -> Phone
+        self.emails = {}  # wartość adresu -> Email
         self.birthday = birthday
         self.address = None  # Add a new property to store the address
 
+    def __setstate__(self, state):
+        # Starsze pliki przechowują telefony i adresy email jako listy
+        self.__dict__.update(state)
+        if isinstance(self.phones, list):
+            self.phones = {phone.value: phone for phone in self.phones}
+        if isinstance(self.emails, list):
+            self.emails = {email.value: email for email in self.emails}
+        if '_name_lower' not in state:
+            self._name_lower = self.name.value.casefold()
+
     def add_address(self, address: Address):
         self.address = address
 
     def add_phone(self, phone: Phone):
-        self.phones.append(phone)
+        self.phones[phone.value] = phone
 
     def remove_phone(self, phone: Phone):
-        self.phones.remove(phone)
+        self.phones.pop(phone.value, None)
 
     def edit_phone(self, old_phone: Phone, new_phone: Phone):
         self.remove_phone(old_phone)
         self.add_phone(new_phone)
 
     def add_email(self, email: Email):
-        self.emails.append(email)
+        self.emails[email.value] = email
 
     def remove_email(self, email: Email):
-        self.emails.remove(email)
+        self.emails.pop(email.value, None)
 
     def edit_email(self, old_email: Email, new_email: Email):
         self.remove_email(old_email)
@@ -147,45 +171,204 @@ class Record:
 
     def edit_name(self, new_name: Name):
         self.name = new_name
+        self._name_lower = new_name.value.casefold()
 
-    def days_to_birthday(self):
+    def days_to_birthday(self, today=None):
         if not self.birthday or not self.birthday.value:
             return "Brak daty urodzenia"
-        today = datetime.now()
-        bday = datetime.strptime(self.birthday.value, "%Y-%m-%d")
-        next_birthday = bday.replace(year=today.year)
-        if today > next_birthday:
-            next_birthday = next_birthday.replace(year=today.year + 1)
+        today = today or date.today()
+        bday = self.birthday._date
+        next_birthday = self._birthday_in_year(bday, today.year)
+        if next_birthday < today:
+            next_birthday = self._birthday_in_year(bday, today.year + 1)
         return (next_birthday - today).days
 
+    @staticmethod
+    def _birthday_in_year(bday, year):
+        """Zwraca datę urodzin w danym roku (29 lutego -> 1 marca)."""
+        try:
+            return bday.replace(year=year)
+        except ValueError:
+            return date(year, 3, 1)
+
     def __str__(self):
-        phones = ', '.join(phone.value for phone in self.phones)
-        emails = ', '.join(email.value for email in self.emails)
-        birthday_str = f", Urodziny: {self.birthday.value}" if self.birthday else ""
-        days_to_bday_str = f", Dni do urodzin: {self.days_to_birthday()}" if self.birthday else ""
+        return self.format()
+
+    def format(self, today=None):
+        """Opis rekordu; today pozwala współdzielić datę przy wyświetlaniu wielu rekordów."""
+        phones = ', '.join(self.phones)
+        emails = ', '.join(self.emails)
+        birthday_str = ""
+        if self.birthday:
+            birthday_str = (f", Urodziny: {self.birthday.value}"
+                            f", Dni do urodzin: {self.days_to_birthday(today)}")
         address_str = f"\nAdres: {self.address.value}" if self.address else ""
         return (f"ID: {self.id}, Imię i nazwisko: {self.name.value}, "
                 f"Telefony: {phones}, Email: {emails}"
-                f"{birthday_str}{days_to_bday_str}{address_str}")
+                f"{birthday_str}{address_str}")
+
+
+class SearchIndex(dict):
+    """Indeks odwrotny: wartość pola -> zbiór ID rekordów.
+
+    Wyszukiwanie fragmentu przegląda wszystkie klucze jednym wywołaniem
+    str.find na złączonym tekście, zamiast porównywać je w pętli Pythona.
+    """
+    SEPARATOR = "\n"
+    # Po tylu trafieniach (udział w liczbie kluczy) zwykła pętla jest szybsza
+    MAX_HIT_RATIO = 1 / 100
+
+    def __init__(self):
+        super().__init__()
+        self._haystack = None
+
+    def add(self, key, record_id):
+        if key not in self:
+            self._haystack = None
+        self.setdefault(key, set()).add(record_id)
+
+    def discard(self, key, record_id):
+        ids = self.get(key)
+        if ids is not None:
+            ids.discard(record_id)
+            if not ids:
+                del self[key]
+                self._haystack = None
+
+    def _get_haystack(self):
+        if self._haystack is None:
+            self._haystack = self.SEPARATOR.join(self)
+        return self._haystack
+
+    def search(self, term):
+        """Zwraca ID rekordów, których klucz zawiera frazę."""
+        found = set()
+        if self.SEPARATOR in term:
+            return found
+        if not term:
+            return found.union(*self.values())
+        haystack = self._get_haystack()
+        budget = max(1, int(len(self) * self.MAX_HIT_RATIO))
+        start = haystack.find(term)
+        key_end = 0
+        while start != -1:
+            if not budget:
+                # Dużo trafień: pozostałe klucze sprawdza zwykła pętla
+                done = haystack.count(self.SEPARATOR, 0, key_end) + 1
+                for key, ids in islice(self.items(), done, None):
+                    if term in key:
+                        found.update(ids)
+                return found
+            budget -= 1
+            key_start = haystack.rfind(self.SEPARATOR, 0, start) + 1
+            key_end = haystack.find(self.SEPARATOR, start)
+            if key_end == -1:
+                key_end = len(haystack)
+            found.update(self[haystack[key_start:key_end]])
+            # Kolejne trafienia w tym samym kluczu nic nie wnoszą
+            start = haystack.find(term, key_end)
+        return found
 
 
 class AddressBook(UserDict):
+    SEARCH_CACHE_SIZE = 32
+
     def __init__(self):
         super().__init__()
         self.next_id = 1
-        self.free_ids = set()
+        self.free_ids = []  # Kopiec min: najmniejsze zwolnione ID wraca pierwsze
+        # Indeksy odwrotne: wartość pola -> zbiór ID rekordów
+        self._name_index = SearchIndex()
+        self._phone_index = SearchIndex()
+        self._email_index = SearchIndex()
+        # Posortowana lista (imię i nazwisko, ID) do wyszukiwania po prefiksie
+        self._sorted_names = []
+        # Gorące pola rekordów w równoległych listach (SoA) dla szybkiego filtrowania
+        self._hot_ids = []
+        self._hot_names = []
+        self._hot_contacts = []  # telefony i adresy email złączone znakiem nowej linii
+        self._hot_pos = {}  # ID rekordu -> pozycja w listach
+        # Wyniki ostatnich wyszukiwań: fraza -> lista pozycji w listach SoA
+        self._search_cache = OrderedDict()
 
     def add_record(self, record: Record):
         """Dodaje wpis do książki adresowej z zarządzaniem ID."""
         record.id = self._get_next_record_id()
         self.data[record.id] = record
+        self._index_record(record)
         print(f"Dodano wpis z ID: {record.id}.")
 
     def _get_next_record_id(self):
         """Pomocnicza metoda do uzyskania kolejnego ID."""
-        while self.next_id in self.data or self.next_id in self.free_ids:
-            self.next_id += 1
-        return self.free_ids.pop() if self.free_ids else self.next_id
+        if self.free_ids:
+            return heapq.heappop(self.free_ids)
+        record_id = self.next_id
+        self.next_id += 1
+        return record_id
+
+    def restore_id_pool(self):
+        """Odtwarza pulę wolnych ID na podstawie wczytanych rekordów."""
+        self.next_id = max(self.data, default=0) + 1
+        self.free_ids = [record_id for record_id in range(1, self.next_id)
+                         if record_id not in self.data]
+        heapq.heapify(self.free_ids)
+
+    def _index_record(self, record):
+        """Dodaje pola rekordu do indeksów wyszukiwania."""
+        self._search_cache.clear()
+        name = record._name_lower
+        self._name_index.add(name, record.id)
+        insort(self._sorted_names, (name, record.id))
+        for phone in record.phones:
+            self._phone_index.add(phone, record.id)
+        for email in record.emails:
+            self._email_index.add(email, record.id)
+        self._hot_pos[record.id] = len(self._hot_ids)
+        self._hot_ids.append(record.id)
+        self._hot_names.append(name)
+        self._hot_contacts.append("\n".join([*record.phones, *record.emails]))
+
+    def _unindex_record(self, record):
+        """Usuwa pola rekordu z indeksów wyszukiwania."""
+        self._search_cache.clear()
+        name = record._name_lower
+        self._name_index.discard(name, record.id)
+        pos = bisect_left(self._sorted_names, (name, record.id))
+        if pos < len(self._sorted_names) and self._sorted_names[pos] == (name, record.id):
+            del self._sorted_names[pos]
+        for phone in record.phones:
+            self._phone_index.discard(phone, record.id)
+        for email in record.emails:
+            self._email_index.discard(email, record.id)
+        # Usunięcie z list SoA przez zamianę z ostatnim elementem
+        pos = self._hot_pos.pop(record.id)
+        last_id = self._hot_ids.pop()
+        last_name = self._hot_names.pop()
+        last_contacts = self._hot_contacts.pop()
+        if pos < len(self._hot_ids):
+            self._hot_ids[pos] = last_id
+            self._hot_names[pos] = last_name
+            self._hot_contacts[pos] = last_contacts
+            self._hot_pos[last_id] = pos
+
+    def rebuild_indexes(self):
+        """Odbudowuje indeksy wyszukiwania, np. po wczytaniu danych z pliku."""
+        self._name_index = SearchIndex()
+        self._phone_index = SearchIndex()
+        self._email_index = SearchIndex()
+        self._sorted_names = []
+        self._hot_ids = []
+        self._hot_names = []
+        self._hot_contacts = []
+        self._hot_pos = {}
+        self._search_cache.clear()
+        for record in self.data.values():
+            self._index_record(record)
+
+    def _remove_record(self, record_id):
+        """Usuwa rekord wraz z wpisami w indeksach i zwalnia jego ID."""
+        self._unindex_record(self.data.pop(record_id))
+        heapq.heappush(self.free_ids, record_id)
 
     def delete_record_by_id(self):
         user_input = input("Podaj ID rekordu, który chcesz usunąć: ").strip()
@@ -194,8 +377,7 @@ class AddressBook(UserDict):
         try:
             record_id = int(record_id_str)
             if record_id in self.data:
-                del self.data[record_id]
-                self.free_ids.add(record_id)
+                self._remove_record(record_id)
                 print(f"Usunięto rekord o ID: {record_id}.")
             else:
                 print("Nie znaleziono rekordu o podanym ID.")
@@ -203,27 +385,64 @@ class AddressBook(UserDict):
             print("Nieprawidłowe ID. Proszę podać liczbę.")
 
     def find_record(self, search_term):
+        cached = self._cached_search(search_term)
+        if SearchIndex.SEPARATOR in search_term:
+            # Fraza nie może obejmować kilku wartości złączonych separatorem
+            found = []
+        elif cached is not None:
+            term_lower = search_term.casefold()
+            names, contacts = self._hot_names, self._hot_contacts
+            found = [pos for pos in cached
+                     if term_lower in names[pos] or search_term in contacts[pos]]
+        else:
+            found_ids = self._find_record_ids(search_term)
+            found = [self._hot_pos[record_id] for record_id in sorted(found_ids)]
+        self._search_cache[search_term] = found
+        self._search_cache.move_to_end(search_term)
+        if len(self._search_cache) > self.SEARCH_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
+        return [self.data[self._hot_ids[pos]] for pos in found]
+
+    def _cached_search(self, search_term):
+        """Zwraca wynik najdłuższej zapamiętanej frazy, którą zaczyna się szukana fraza."""
+        best = None
+        for term in self._search_cache:
+            if search_term.startswith(term) and (best is None or len(term) > len(best)):
+                best = term
+        return None if best is None else self._search_cache[best]
+
+    def _find_record_ids(self, search_term):
+        found_ids = self._name_index.search(search_term.casefold())
+        if search_term in self._phone_index:
+            # Numery telefonów mają stałą długość, więc trafienie dokładne
+            # jest pełnym wynikiem dla indeksu telefonów
+            found_ids.update(self._phone_index[search_term])
+        else:
+            found_ids.update(self._phone_index.search(search_term))
+        found_ids.update(self._email_index.search(search_term))
+        return found_ids
+
+    def find_by_prefix(self, prefix):
+        """Zwraca rekordy, których imię i nazwisko zaczyna się od prefiksu.
+
+        Korzysta z posortowanej listy nazw (O(log n + k)); wyszukiwanie
+        fragmentu w dowolnym miejscu obsługuje find_record.
+        """
+        prefix = prefix.casefold()
         found_records = []
-        for record in self.data.values():
-            if search_term.lower() in record.name.value.lower():
-                found_records.append(record)
-                continue
-            for phone in record.phones:
-                if search_term in phone.value:
-                    found_records.append(record)
-                    break
-            for email in record.emails:
-                if search_term in email.value:
-                    found_records.append(record)
-                    break
+        pos = bisect_left(self._sorted_names, (prefix, -1))
+        while pos < len(self._sorted_names):
+            name, record_id = self._sorted_names[pos]
+            if not name.startswith(prefix):
+                break
+            found_records.append(self.data[record_id])
+            pos += 1
         return found_records
 
     def find_records_by_name(self, name):
-        matching_records = []
-        for record_id, record in self.data.items():
-            if name.lower() in record.name.value.lower():
-                matching_records.append((record_id, record))
-        return matching_records
+        matching_ids = self._name_index.search(name.casefold())
+        return [(record_id, self.data[record_id])
+                for record_id in sorted(matching_ids)]
 
     def delete_record(self):
         name_to_delete = input(
@@ -242,9 +461,8 @@ class AddressBook(UserDict):
             record_id_to_delete = int(
                 input("Podaj ID rekordu, który chcesz usunąć: "))
             if record_id_to_delete in self.data:
-                del self.data[record_id_to_delete]
-                # Add the ID back to the free ID pool
-                self.free_ids.add(record_id_to_delete)
+                # Usuwa rekord z indeksów i zwraca ID do puli wolnych ID
+                self._remove_record(record_id_to_delete)
                 print(f"Usunięto rekord o ID: {record_id_to_delete}.")
             else:
                 print("Nie znaleziono rekordu o podanym ID.")
@@ -252,16 +470,13 @@ class AddressBook(UserDict):
             print("Nieprawidłowe ID. Proszę podać liczbę.")
 
     def __iter__(self):
-        self.current = 0
-        return self
-
-    def __next__(self):
-        if self.current < len(self.data):
-            records = list(self.data.values())[self.current:self.current+5]
-            self.current += 5
-            return records
-        else:
-            raise StopIteration
+        """Zwraca rekordy w porcjach po 5."""
+        records = iter(self.data.values())
+        while True:
+            chunk = list(islice(records, 5))
+            if not chunk:
+                return
+            yield chunk
 
     def edit_record(self):
 
@@ -293,25 +508,30 @@ class AddressBook(UserDict):
             print("Nieprawidłowa wartość. Proszę podać liczbę.")
             return
 
+        # Indeksy są aktualizowane po zakończeniu edycji
+        self._unindex_record(record)
+
         # Edycja imienia i nazwiska
         new_name_input = input(
             'Podaj nowe imię i nazwisko (lub wciśnij Enter, aby pominąć): ')
         if new_name_input:
-            record.name = Name(new_name_input)
+            record.edit_name(Name(new_name_input))
 
         # Edycja numeru telefonu
         if record.phones:
+            phones = list(record.phones.values())
             print("Obecne numery telefonów:")
-            for idx, phone in enumerate(record.phones, 1):
+            for idx, phone in enumerate(phones, 1):
                 print(f"{idx}. {phone.value}")
             phone_choice = input(
                 "Wybierz numer do edycji (lub wciśnij Enter, aby pominąć): ")
             if phone_choice.isdigit():
                 phone_index = int(phone_choice) - 1
-                if 0 <= phone_index < len(record.phones):
+                if 0 <= phone_index < len(phones):
                     new_phone_value = input("Podaj nowy numer telefonu: ")
                     if PhoneValidator.validate(new_phone_value):
-                        record.phones[phone_index] = Phone(new_phone_value)
+                        record.edit_phone(
+                            phones[phone_index], Phone(new_phone_value))
                     else:
                         print("Niepoprawny format numeru telefonu.")
                 else:
@@ -321,18 +541,20 @@ class AddressBook(UserDict):
 
         # Edycja adresu email
         if record.emails:
+            emails = list(record.emails.values())
             # Wyświetlenie obecnych adresów email
             print("Obecne adresy email:")
-            for idx, email in enumerate(record.emails, 1):
+            for idx, email in enumerate(emails, 1):
                 print(f"{idx}. {email.value}")
             email_choice = input(
                 "Wybierz adres email do edycji (lub wciśnij Enter, aby pominąć): ")
             if email_choice.isdigit():
                 email_index = int(email_choice) - 1
-                if 0 <= email_index < len(record.emails):
+                if 0 <= email_index < len(emails):
                     new_email_value = input("Podaj nowy adres email: ")
                     if EmailValidator.validate(new_email_value):
-                        record.emails[email_index] = Email(new_email_value)
+                        record.edit_email(
+                            emails[email_index], Email(new_email_value))
                     else:
                         print("Niepoprawny format adresu email.")
                 else:
@@ -348,13 +570,14 @@ class AddressBook(UserDict):
             else:
                 print("Niepoprawny format daty urodzenia.")
 
+        self._index_record(record)
         print("Wpis zaktualizowany.")
 
 
 def save_address_book(book, filename='address_book.pkl'):
     try:
-        with open(filename, 'wb') as file:
-            pickle.dump(book.data, file)
+        with open(filename, 'wb', buffering=_PICKLE_BUFFER_SIZE) as file:
+            pickle.dump(book.data, file, protocol=pickle.HIGHEST_PROTOCOL)
         print("Zapisano książkę adresową.")
     except Exception as e:
         print(f"Błąd przy zapisie książki adresowej: {e}")
@@ -366,6 +589,8 @@ def load_address_book(filename='address_book.pkl'):
             data = pickle.load(file)
             book = AddressBook()
             book.data = data
+            book.restore_id_pool()
+            book.rebuild_indexes()
             print("Książka adresowa została wczytana.")
             return book
     except FileNotFoundError:
@@ -469,13 +694,26 @@ class Note:
 class Notebook:
     def __init__(self):
         self.notes = []
-        self.tag_manager = TagManager(self.notes)  # Adding TagManager
+        self._tag_index = defaultdict(set)  # tag -> indeksy notatek
+        self.tag_manager = TagManager(
+            self.notes, on_reorder=self._rebuild_tag_index)  # Adding TagManager
 
     def add_note(self, title, content, tags=None):
-        tags = tags or []  # Ustaw pustą listę, jeśli tags jest None
+        tags = frozenset(tags or ())  # Zbiór tagów, pusty jeśli tags jest None
         note = {"title": title, "content": content, "tags": tags}
         self.notes.append(note)
+        for tag in tags:
+            self._tag_index[tag].add(len(self.notes) - 1)
         self.update_tags()
+        self.tag_manager.add_tags(tags)
+
+    def _rebuild_tag_index(self):
+        """Odbudowuje indeks tagów po zmianie kolejności lub tagów notatek."""
+        self.tag_manager.invalidate_tags()
+        self._tag_index = defaultdict(set)
+        for idx, note in enumerate(self.notes):
+            for tag in note.get('tags', ()):
+                self._tag_index[tag].add(idx)
 
     def update_tags(self):
         self.tag_manager.set_notes(self.notes)
@@ -484,16 +722,16 @@ class Notebook:
         if not self.notes:
             print("Brak notatek do wyświetlenia.")
             return
-        for idx, note in enumerate(self.notes, start=1):
-            print(f"""ID: {idx} Tytuł: {note.get('title', 'Brak tytułu')}
+        print("\n".join(f"""ID: {idx} Tytuł: {note.get('title', 'Brak tytułu')}
     Treść: {note.get('content', 'Brak treści')}
-    Tagi: {', '.join(note.get('tags', []))}""")
+    Tagi: {', '.join(sorted(note.get('tags', ())))}""" for idx, note in enumerate(self.notes, start=1)))
 
     def delete_note(self, note_id):
         try:
             note_id = int(note_id)
             if 0 < note_id <= len(self.notes):
                 deleted_note = self.notes.pop(note_id - 1)
+                self._rebuild_tag_index()
                 print(
                     f"Usunięto notatkę: {deleted_note.get('title', 'Brak tytułu')}")
             else:
@@ -527,13 +765,14 @@ class Notebook:
             "Podaj nową treść notatki (naciśnij Enter, aby pominąć): ")
         tags_input = input(
             "Podaj nowe tagi oddzielone przecinkami (lub wciśnij Enter, aby pominąć): ")
-        tags = [tag.strip() for tag in tags_input.split(",")
-                ] if tags_input else note['tags']
+        tags = frozenset(tag.strip() for tag in tags_input.split(",")
+                         ) if tags_input else note['tags']
 
         # Aktualizacja notatki
         note['title'] = title if title else note['title']
         note['content'] = content if content else note['content']
         note['tags'] = tags
+        self._rebuild_tag_index()
 
         print("Notatka została zaktualizowana.")
 
@@ -545,25 +784,27 @@ class Notebook:
         if content:
             note['content'] = content
         if tags is not None:
-            note['tags'] = tags
+            note['tags'] = frozenset(tags)
+            self._rebuild_tag_index()
 
         print("Notatka została zaktualizowana.")
 
         print("Notatka została zaktualizowana.")
 
     def search_notes_by_tag(self, tag):
-        found_notes = [note for note in self.notes if tag in note['tags']]
+        found_notes = [self.notes[idx]
+                       for idx in sorted(self._tag_index.get(tag, ()))]
         if not found_notes:
             print("Nie znaleziono notatek z podanym tagiem.")
         else:
             for note in found_notes:
                 print(
-                    f"Tytuł: {note['title']}\nTreść: {note['content']}\nTagi: {', '.join(note['tags'])}")
+                    f"Tytuł: {note['title']}\nTreść: {note['content']}\nTagi: {', '.join(sorted(note['tags']))}")
 
     def save_notes(self, filename='notes.pkl'):
         try:
-            with open(filename, 'wb') as file:
-                pickle.dump(self.notes, file)
+            with open(filename, 'wb', buffering=_PICKLE_BUFFER_SIZE) as file:
+                pickle.dump(self.notes, file, protocol=pickle.HIGHEST_PROTOCOL)
             print("Notatki zostały zapisane.")
         except Exception as e:
             print(f"Błąd przy zapisie notatek: {e}")
@@ -572,6 +813,11 @@ class Notebook:
         try:
             with open(filename, 'rb') as file:
                 self.notes = pickle.load(file)
+            # Starsze pliki przechowują tagi jako listy
+            for note in self.notes:
+                note['tags'] = frozenset(note.get('tags', ()))
+            self.update_tags()
+            self._rebuild_tag_index()
             print("Notatki zostały wczytane.")
         except FileNotFoundError:
             print("Plik z notatkami nie istnieje. Tworzenie nowego pliku.")
@@ -581,7 +827,8 @@ class Notebook:
 
     def sort_notes_by_tags(self, tag):
         """Sortuje notatki według daty utworzenia dla wybranego tagu."""
-        notes_with_tag = [note for note in self.notes if tag in note['tags']]
+        positions = self._tag_index.get(tag, set())
+        notes_with_tag = [self.notes[idx] for idx in sorted(positions)]
         if not notes_with_tag:
             print("Brak notatek z podanym tagiem.")
             return False  # Wskazuje na to, że sortowanie nie zostało wykonane
@@ -589,54 +836,72 @@ class Notebook:
         sorted_notes = sorted(notes_with_tag, key=lambda x: x.get(
             'created_at', datetime.min), reverse=True)
         self.notes = sorted_notes + \
-            [note for note in self.notes if note not in notes_with_tag]
+            [note for idx, note in enumerate(self.notes) if idx not in positions]
+        self.update_tags()
+        self._rebuild_tag_index()
         return True
 
     def show_unique_tags(self):
-        unique_tags = set()
-        for note in self.notes:
-            for tag in note['tags']:
-                unique_tags.add(tag)
-        print("Dostępne tagi:", ", ".join(unique_tags)
-              if unique_tags else "Brak tagów")
+        print("Dostępne tagi:", ", ".join(sorted(self._tag_index))
+              if self._tag_index else "Brak tagów")
 
 
 class TagManager:
-    def __init__(self, notes):
+    def __init__(self, notes, on_reorder=None):
+        self.notes = None
+        self._unique_tags = None  # Zbiór tagów liczony leniwie
         self.set_notes(notes)
+        self.on_reorder = on_reorder  # Wywoływane po zmianie kolejności notatek
 
     def set_notes(self, notes):
+        if notes is not self.notes:
+            self.invalidate_tags()
         self.notes = notes
 
+    def invalidate_tags(self):
+        """Oznacza zbiór tagów do przeliczenia przy następnym odczycie."""
+        self._unique_tags = None
+
+    def add_tags(self, tags):
+        if self._unique_tags is not None:
+            self._unique_tags.update(tags)
+
+    def get_unique_tags(self):
+        if self._unique_tags is None:
+            self._unique_tags = set()
+            for note in self.notes:
+                self._unique_tags.update(note.get('tags', ()))
+        return self._unique_tags
+
     def display_available_tags(self):
         """Wyświetla dostępne tagi."""
-        tags = set()
-        for note in self.notes:
-            tags.update(note['tags'])
+        tags = self.get_unique_tags()
         if tags:
-            print("Dostępne tagi:", ', '.join(tags))
+            print("Dostępne tagi:", ', '.join(sorted(tags)))
         else:
             print("Brak dostępnych tagów.")
 
     def search_notes_by_tag(self, tag):
         self.display_available_tags()  # Shows available tags before searching
         found_notes = [
-            note for note in self.notes if tag in note.get('tags', [])]
+            note for note in self.notes if tag in note.get('tags', ())]
         if not found_notes:
             print("Nie znaleziono notatek z podanym tagiem.")
             return
         for note in found_notes:
             print(
-                f"Tytuł: {note['title']}\nTreść: {note['content']}\nTagi: {', '.join(note['tags'])}")
+                f"Tytuł: {note['title']}\nTreść: {note['content']}\nTagi: {', '.join(sorted(note['tags']))}")
 
     def sort_notes_by_tags(self, tag):
         self.display_available_tags()  # Shows available tags before sorting
-        tag_exists = any(tag in note.get('tags', []) for note in self.notes)
+        tag_exists = any(tag in note.get('tags', ()) for note in self.notes)
         if not tag_exists:
             print("Nie ma takiego tagu.")
             return False
-        self.notes.sort(key=lambda note: list(
-            note['tags']).count(tag), reverse=True)
+        # Notatki z danym tagiem trafiają na początek, kolejność pozostałych bez zmian
+        self.notes.sort(key=lambda note: tag not in note.get('tags', ()))
+        if self.on_reorder:
+            self.on_reorder()
         print("Posortowano notatki według tagu:", tag)
         return True
 
@@ -654,7 +919,7 @@ def main():
             while True:
                 contact_action = user_interface.get_input(
                     "Wybierz działanie: \nDodaj kontakt (add), Znajdź kontakt (find), "
-                    "Usuń kontakt (delete), Edytuj kontakt (edit), Pokaż wszystkie (show), Wróć (q): ")
+                    "Znajdź po początku imienia i nazwiska (prefix), Usuń kontakt (delete), Edytuj kontakt (edit), Pokaż wszystkie (show), Wróć (q): ")
                 if contact_action == 'add':
                     record = create_record()
                     book.add_record(record)
@@ -662,9 +927,19 @@ def main():
                 elif contact_action == 'find':
                     search_term = input("Wpisz szukaną frazę: ")
                     found = book.find_record(search_term)
+                    today = date.today()
                     for record in found:
-                        print(record)
+                        print(record.format(today))
 
+                elif contact_action == 'prefix':
+                    prefix = input("Wpisz początek imienia i nazwiska: ")
+                    found = book.find_by_prefix(prefix)
+                    if not found:
+                        user_interface.display_message(
+                            "Nie znaleziono pasujących rekordów.")
+                    today = date.today()
+                    for record in found:
+                        print(record.format(today))
                 elif contact_action == 'delete':
                     book.delete_record_by_id()
                     user_interface.display_message("Usunięto kontakt.")
@@ -707,13 +982,12 @@ def main():
                     notebook.show_unique_tags()
                     tag = input(
                         "Podaj tag po którym chcesz sortować notatki: ")
-                    if notebook.sort_notes_by_tags(tag):
+                    sorted_ok = notebook.sort_notes_by_tags(tag)
+                    if sorted_ok:
                         notebook.show_notes()
                     else:
                         user_interface.display_message(
                             "Sortowanie nie zostało wykonane.")
-                    if notebook.sort_notes_by_tags(tag):
-                        notebook.show_notes()
                 elif note_action == 'q':
                     break
                 else: